@@ -1,22 +1,42 @@
-import inspect
+import enum
+import functools
 import logging
 import os
 import shutil
+import socket
 import subprocess
+import sys
+import threading
 import time
-from typing import Any, Dict, List, Literal, Optional, Tuple, Type, Union, cast
+from types import MappingProxyType
+from typing import (
+    Any,
+    Dict,
+    Final,
+    List,
+    Literal,
+    Mapping,
+    Optional,
+    Sequence,
+    TYPE_CHECKING,
+    Tuple,
+    Type,
+    Union,
+    cast,
+)
 
 
 import ddtrace
 from ddtrace.internal.compat import get_connection_response, httplib
-from ddtrace.internal.writer import AgentWriter
-from ddtrace.internal.utils.formats import asbool
-from ddtrace.profiling import Profiler
-from ddtrace.runtime import RuntimeMetrics
+from ddtrace.internal.service import ServiceStatus
 from ddtrace._logger import DD_LOG_FORMAT
 
 from ._metrics import MetricsClient
 from ._logging import V2LogWriter
+from ._sender import HttpSender
+
+if TYPE_CHECKING:
+    from ddtrace.profiling import Profiler
 
 
 logger = logging.getLogger(__name__)
@@ -26,32 +46,83 @@ TraceSampleRule = Tuple[str, str, float]
 # _JSON = Union[str, float, int, List["_JSON"], Dict[str, "_JSON"], None]
 
 
-class _Sentinel(object):
+# A single member enum so that mypy narrows `x is _sentinel` checks.
+class _Sentinel(enum.Enum):
+    token = 0
+
     def __bool__(self):
         return False
 
 
-_sentinel = _Sentinel()
-
+_sentinel = _Sentinel.token  # type: Final
+
+
+_TRUE = frozenset(("1", "true", "yes", "on", "t", "y"))
+
+
+def _as_bool(value):
+    # type: (Any) -> bool
+    return str(value).strip().lower() in _TRUE
+
+
+_DEFAULT_AGENT_HOSTNAME = "localhost"
+_DEFAULT_AGENT_RUN = False
+_DEFAULT_AGENT_VERSION = "7.50.3"
+_DEFAULT_DATADOG_SITE = "datadoghq.com"
+_DEFAULT_DATADOG_HOSTNAME = socket.gethostname()
+_DEFAULT_REMOTE_CONFIGURATION_ENABLED = True
+_DEFAULT_METRICS_PORT = 8125
+_DEFAULT_TRACING_PORT = 8126
+_DEFAULT_TRACING_ENABLED = True
+_DEFAULT_TRACING_PATCH = False
+_DEFAULT_TRACING_MODULES = ("django", "redis")
+_DEFAULT_PROFILING_ENABLED = False
+_DEFAULT_RUNTIME_METRICS_ENABLED = False
+
+
+# Read-only so that the shared defaults cannot be mutated through one config.
+_DEFAULT_CONFIG = MappingProxyType(
+    dict(
+        agent_hostname=_DEFAULT_AGENT_HOSTNAME,
+        agent_run=_DEFAULT_AGENT_RUN,
+        agent_version=_DEFAULT_AGENT_VERSION,
+        datadog_site=_DEFAULT_DATADOG_SITE,
+        datadog_hostname=_DEFAULT_DATADOG_HOSTNAME,
+        remote_configuration_enabled=_DEFAULT_REMOTE_CONFIGURATION_ENABLED,
+        metrics_port=_DEFAULT_METRICS_PORT,
+        tracing_port=_DEFAULT_TRACING_PORT,
+        tracing_enabled=_DEFAULT_TRACING_ENABLED,
+        tracing_patch=_DEFAULT_TRACING_PATCH,
+        tracing_modules=_DEFAULT_TRACING_MODULES,
+        profiling_enabled=_DEFAULT_PROFILING_ENABLED,
+        runtime_metrics_enabled=_DEFAULT_RUNTIME_METRICS_ENABLED,
+    )
+)  # type: Mapping[str, Any]
+
+# How long flush(wait=True) and shutdown() wait for queued logs and metrics to
+# be sent.
+_FLUSH_TIMEOUT = 5.0
+
+
+class DDConfig:
+    __slots__ = (
+        "agent_hostname",
+        "agent_run",
+        "agent_version",
+        "api_key",
+        "site",
+        "hostname",
+        "remote_configuration_enabled",
+        "service",
+        "env",
+        "version",
+        "metrics_port",
+        "tracing_port",
+        "tracing_enabled",
+        "profiling_enabled",
+        "runtime_metrics_enabled",
+    )
 
-_DEFAULT_CONFIG = dict(
-    agent_hostname="localhost",
-    agent_run=False,
-    agent_version="7.50.3",
-    datadog_site="datadoghq.com",
-    datadog_hostname=ddtrace.internal.hostname.get_hostname(),
-    remote_configuration_enabled=True,
-    metrics_port=8125,
-    tracing_port=8126,
-    tracing_enabled=True,
-    tracing_patch=False,
-    tracing_modules=["django", "redis", ...],
-    profiling_enabled=False,
-    runtime_metrics_enabled=False,
-)  # type: Dict[str, Any]
-
-
-class DDConfig(object):
     def __init__(
         self,
         agent_hostname=_sentinel,  # type: Union[_Sentinel, str]
@@ -69,49 +140,52 @@ class DDConfig(object):
         tracing_port=_sentinel,  # type: Union[_Sentinel, int]
         tracing_enabled=_sentinel,  # type: Union[_Sentinel, bool]
         tracing_patch=_sentinel,  # type: Union[_Sentinel, bool]
-        tracing_modules=_sentinel,  # type: Union[_Sentinel, List[str]]
+        tracing_modules=_sentinel,  # type: Union[_Sentinel, Sequence[str]]
         tracing_sampling_rules=_sentinel,  # type: Union[_Sentinel, List[TraceSampleRule]]
         tracing_integration_configs=_sentinel,  # type: Union[_Sentinel, ]
         profiling_enabled=_sentinel,  # type: Union[_Sentinel, bool]
         security_enabled=_sentinel,  # type: Union[_Sentinel, bool]
         runtime_metrics_enabled=_sentinel,  # type: Union[_Sentinel, bool]
-        default_config=_DEFAULT_CONFIG,  # type: Dict[str, Any]
+        default_config=_DEFAULT_CONFIG,  # type: Mapping[str, Any]
     ):
         # type: (...) -> None
-        if isinstance(agent_hostname, _Sentinel):
-            agent_hostname = os.getenv(
+        environ = os.environ
+        if agent_hostname is _sentinel:
+            agent_hostname = environ.get(
                 "DD_AGENT_HOST", default_config["agent_hostname"]
             )
-        self.agent_hostname = agent_hostname
-        if isinstance(agent_version, _Sentinel):
-            agent_version = os.getenv(
+        self.agent_hostname = cast(str, agent_hostname)
+        if agent_version is _sentinel:
+            agent_version = environ.get(
                 "DD_AGENT_VERSION", default_config["agent_version"]
             )
-        self.agent_version = agent_version
+        self.agent_version = cast(str, agent_version)
 
-        if isinstance(agent_run, _Sentinel):
-            agent_run = asbool(os.getenv("DD_AGENT_RUN", default_config["agent_run"]))
+        if agent_run is _sentinel:
+            agent_run = _as_bool(
+                environ.get("DD_AGENT_RUN", default_config["agent_run"])
+            )
         self.agent_run = agent_run
 
-        if isinstance(api_key, _Sentinel):
-            api_key = os.getenv("DD_API_KEY", api_key)
-        if isinstance(api_key, _Sentinel):
+        if api_key is _sentinel:
+            api_key = environ.get("DD_API_KEY", api_key)
+        if api_key is _sentinel:
             raise ValueError("An API key must be set")
         self.api_key = api_key
 
-        if isinstance(datadog_site, _Sentinel):
-            datadog_site = os.getenv("DD_SITE", default_config["datadog_site"])
+        if datadog_site is _sentinel:
+            datadog_site = environ.get("DD_SITE", default_config["datadog_site"])
         self.site = cast(str, datadog_site)
 
-        if isinstance(datadog_hostname, _Sentinel):
-            datadog_hostname = os.getenv(
+        if datadog_hostname is _sentinel:
+            datadog_hostname = environ.get(
                 "DD_HOSTNAME", default_config["datadog_hostname"]
             )
         self.hostname = cast(str, datadog_hostname)
 
-        if isinstance(remote_configuration_enabled, _Sentinel):
-            remote_configuration_enabled = asbool(
-                os.getenv(
+        if remote_configuration_enabled is _sentinel:
+            remote_configuration_enabled = _as_bool(
+                environ.get(
                     "DD_REMOTE_CONFIGURATION_ENABLED",
                     default_config["remote_configuration_enabled"],
                 )
@@ -119,7 +193,7 @@ class DDConfig(object):
         self.remote_configuration_enabled = remote_configuration_enabled
 
         if service is _sentinel:
-            service = os.getenv("DD_SERVICE", service)
+            service = environ.get("DD_SERVICE", service)
         if service is _sentinel or not service:
             raise ValueError(
                 "A service name must be set, refer to the documentation for unified service tagging here: https://docs.datadoghq.com/getting_started/tagging/unified_service_tagging/"
@@ -127,20 +201,20 @@ class DDConfig(object):
         self.service = service
 
         if env is _sentinel:
-            env = os.getenv("DD_ENV", env)
+            env = environ.get("DD_ENV", env)
         if env is _sentinel or not env:
             raise ValueError(
                 "An env must be set, refer to the documentation for unified service tagging here: https://docs.datadoghq.com/getting_started/tagging/unified_service_tagging/"
             )
         self.env = env
 
-        if isinstance(version, _Sentinel):
-            version = os.getenv("DD_VERSION", version)
+        if version is _sentinel:
+            version = environ.get("DD_VERSION", version)
         self.version = version
 
-        if isinstance(version_use_git, _Sentinel):
-            if "DD_VERSION_USE_GIT" in os.environ:
-                if asbool(os.getenv("DD_VERSION_USE_GIT")):
+        if version_use_git is _sentinel:
+            if "DD_VERSION_USE_GIT" in environ:
+                if _as_bool(environ["DD_VERSION_USE_GIT"]):
                     version_use_git = True
         if version_use_git:
             import git
@@ -149,58 +223,58 @@ class DDConfig(object):
                 git.Repo(search_parent_directories=True).head.object.hexsha[0:6]
             )
 
-        if not isinstance(version, _Sentinel) and not isinstance(
-            version_use_git, _Sentinel
-        ):
+        if version is not _sentinel and version_use_git is not _sentinel:
             raise ValueError(
-                "Ambiguous version! Cannot use both custom version %r and git version"
-                % self.version
+                "Ambiguous version! Cannot use both custom version "
+                f"{self.version!r} and git version"
             )
         if not self.version:
             raise ValueError(
                 "A version must be set, refer to the documentation for unified service tagging here: https://docs.datadoghq.com/getting_started/tagging/unified_service_tagging/"
             )
 
-        if isinstance(metrics_port, _Sentinel):
+        if metrics_port is _sentinel:
             metrics_port = int(
-                os.getenv("DD_DOGSTATSD_PORT", default_config["metrics_port"])
+                environ.get("DD_DOGSTATSD_PORT", default_config["metrics_port"])
             )
         self.metrics_port = metrics_port
 
-        if isinstance(tracing_port, _Sentinel):
+        if tracing_port is _sentinel:
             tracing_port = int(
-                os.getenv("DD_AGENT_PORT", default_config["tracing_port"])
+                environ.get("DD_AGENT_PORT", default_config["tracing_port"])
             )
         self.tracing_port = tracing_port
 
-        if isinstance(tracing_enabled, _Sentinel):
-            tracing_enabled = asbool(
-                os.getenv("DD_TRACE_ENABLED", default_config["tracing_enabled"])
+        if tracing_enabled is _sentinel:
+            tracing_enabled = _as_bool(
+                environ.get("DD_TRACE_ENABLED", default_config["tracing_enabled"])
             )
         self.tracing_enabled = tracing_enabled
 
-        if isinstance(tracing_modules, _Sentinel):
-            tracing_modules = (
-                os.getenv("DD_TRACE_MODULES", "").split(",")
-                or default_config["tracing_modules"]
-            )
-
-        if isinstance(tracing_patch, _Sentinel):
-            tracing_patch = asbool(
-                os.getenv("DD_TRACE_PATCH", default_config["tracing_patch"])
+        if tracing_modules is _sentinel:
+            # An unset (or empty) DD_TRACE_MODULES falls back to the defaults.
+            raw_modules = environ.get("DD_TRACE_MODULES")
+            if raw_modules:
+                tracing_modules = tuple(raw_modules.split(","))
+            else:
+                tracing_modules = cast(Sequence[str], default_config["tracing_modules"])
+
+        if tracing_patch is _sentinel:
+            tracing_patch = _as_bool(
+                environ.get("DD_TRACE_PATCH", default_config["tracing_patch"])
             )
         if tracing_patch:
             ddtrace.patch(**{m: True for m in tracing_modules})
 
         if profiling_enabled is _sentinel:
-            profiling_enabled = asbool(
-                os.getenv("DD_PROFILING_ENABLED", default_config["profiling_enabled"])
+            profiling_enabled = _as_bool(
+                environ.get("DD_PROFILING_ENABLED", default_config["profiling_enabled"])
             )
         self.profiling_enabled = profiling_enabled
 
         if runtime_metrics_enabled is _sentinel:
-            runtime_metrics_enabled = asbool(
-                os.getenv(
+            runtime_metrics_enabled = _as_bool(
+                environ.get(
                     "DD_RUNTIME_METRICS_ENABLED",
                     default_config["runtime_metrics_enabled"],
                 )
@@ -208,7 +282,29 @@ class DDConfig(object):
         self.runtime_metrics_enabled = runtime_metrics_enabled
 
 
+@functools.lru_cache(maxsize=1)
+def _docker_path():
+    # type: () -> Optional[str]
+    return shutil.which("docker")
+
+
 class DDAgent:
+    _STATIC_DOCKER_ARGS = (
+        "run",
+        "--name=datadog-agent",
+        "--detach",
+        "--rm",
+        "--publish=8126:8126",
+        "--publish=8125:8125",
+        "--volume=/var/run/docker.sock:/var/run/docker.sock",
+        "--volume=/proc/:/host/proc/:ro",
+        "--volume=/sys/fs/cgroup:/host/sys/fs/cgroup:ro",
+        "--env=DD_DOGSTATSD_NON_LOCAL_TRAFFIC=true",
+        "--env=DD_BIND_HOST=0.0.0.0",
+    )
+
+    __slots__ = ("_proc", "_version", "_config")
+
     def __init__(self, version: str, config: DDConfig):
         self._proc = None
         self._version = version
@@ -217,54 +313,71 @@ class DDAgent:
     def start(self, wait: bool):
         if self._proc:
             raise RuntimeError("Agent is already running")
-        docker_exec = shutil.which("docker")
+        docker_exec = _docker_path()
         if not docker_exec:
             raise RuntimeError(
                 "docker installation not found and is required for running the agent"
             )
         docker_cmd = [
             docker_exec,
-            "run",
-            "--name=datadog-agent",
-            "--detach",
-            "--rm",
-            "--publish=8126:8126",
-            "--publish=8125:8125",
-            "--volume=/var/run/docker.sock:/var/run/docker.sock",
-            "--volume=/proc/:/host/proc/:ro",
-            "--volume=/sys/fs/cgroup:/host/sys/fs/cgroup:ro",
-            "--env=DD_API_KEY=%s" % self._config.api_key,
-            "--env=DD_REMOTE_CONFIGURATION_ENABLED=%s"
-            % ("true" if self._config.remote_configuration_enabled else "false"),
-            "--env=DD_SITE=%s" % self._config.site,
-            "--env=DD_DOGSTATSD_NON_LOCAL_TRAFFIC=true",
-            "--env=DD_BIND_HOST=0.0.0.0",
-            "datadog/agent:%s" % self._version,
+            *self._STATIC_DOCKER_ARGS,
+            f"--env=DD_API_KEY={self._config.api_key}",
+            "--env=DD_REMOTE_CONFIGURATION_ENABLED="
+            + ("true" if self._config.remote_configuration_enabled else "false"),
+            f"--env=DD_SITE={self._config.site}",
+            f"datadog/agent:{self._version}",
         ]
         logger.debug("starting agent with command %r", " ".join(docker_cmd))
         subprocess.run(docker_cmd, check=True, capture_output=True)
         if wait:
-            while True:
-                conn = httplib.HTTPConnection(
-                    self._config.agent_hostname, self._config.tracing_port, timeout=1.0
-                )
-                try:
-                    conn.request("GET", "/info", {}, {})
-                    resp = get_connection_response(conn)
-                except Exception:
-                    time.sleep(0.01)
-                else:
-                    if resp.status == 200:
-                        break
-                finally:
-                    conn.close()
+            # Poll with exponential backoff on a single connection object;
+            # http.client reconnects on the next request after close().
+            conn = httplib.HTTPConnection(
+                self._config.agent_hostname, self._config.tracing_port, timeout=1.0
+            )
+            delay = 0.01
+            try:
+                while True:
+                    try:
+                        conn.request("GET", "/info", {}, {})
+                        resp = get_connection_response(conn)
+                        resp.read()
+                    except Exception:
+                        conn.close()
+                    else:
+                        if resp.status == 200:
+                            break
+                    time.sleep(delay)
+                    delay = min(delay * 2, 0.5)
+            finally:
+                conn.close()
 
     def stop(self):
         if self._proc:
-            subprocess.run([shutil.which("docker"), "kill", "datadog-agent"], check=True, capture_output=True)
+            subprocess.run(
+                [_docker_path(), "kill", "datadog-agent"],
+                check=True,
+                capture_output=True,
+            )
 
 
 class DDClient:
+    __slots__ = (
+        "_config",
+        "_tracer",
+        "_sender",
+        "_lazy_lock",
+        "_log_writer",
+        "_metrics_client",
+        "_profiler_instance",
+        "_log_handler_cls",
+        "_base_metric_tags",
+        "_ddtags",
+        "_ddtag_suffix",
+        "_log_template",
+        "_agent",
+    )
+
     def __init__(
         self,
         config,  # type: DDConfig
@@ -275,35 +388,42 @@ class DDClient:
         ddtrace.config.env = config.env
         ddtrace.config.version = config.version
         ddtrace.config._128_bit_trace_id_enabled = False
-        self._tracer = ddtrace.Tracer()
-        self._tracer.configure(
-            enabled=config.tracing_enabled,
-            writer=AgentWriter(
-                agent_url="http://%s:%s" % (config.agent_hostname, config.tracing_port)
-            ),
-        )
-        self._logger = V2LogWriter(
-            site=config.site,
-            api_key=config.api_key,
-            interval=0.5,
-            timeout=2.0,
-        )
-        self._logger.start()
-        self._metrics = MetricsClient(
-            site=config.site,
-            api_key=config.api_key,
+        # Pass the agent url at construction so the tracer builds its writer
+        # (and span processors) once rather than replacing them in configure().
+        self._tracer = ddtrace.Tracer(
+            url=f"http://{config.agent_hostname}:{config.tracing_port}"
         )
-        self._profiler = Profiler(
-            # url=config.agent_url,  # this url is for backend
-            api_key=config.api_key,
-            service=config.service,
-            env=config.env,
-            version=config.version,
-            tracer=self._tracer,
+        self._tracer.configure(enabled=config.tracing_enabled)
+        # Shared by the log writer and metrics client to make their intake
+        # requests off the calling thread.
+        self._sender = HttpSender()
+        self._lazy_lock = threading.Lock()
+        self._log_writer = None  # type: Optional[V2LogWriter]
+        self._metrics_client = None  # type: Optional[MetricsClient]
+        self._profiler_instance = None  # type: Optional[Profiler]
+        self._log_handler_cls = None  # type: Optional[Type[logging.Handler]]
+        # Unified service tags attached to every metric and log. The log
+        # ddtags are pre-joined, with and without a leading separator for
+        # appending to caller supplied tags.
+        self._base_metric_tags = (
+            f"service:{config.service}",
+            f"env:{config.env}",
+            f"version:{config.version}",
         )
+        self._ddtags = f"env:{config.env},version:{config.version}"
+        self._ddtag_suffix = "," + self._ddtags
+        # Fields that are the same for every log event; copying a prebuilt dict
+        # is cheaper than building a literal from config attributes per log.
+        self._log_template = {
+            "hostname": config.hostname,
+            "service": config.service,
+            "ddsource": "python",
+        }  # type: Dict[str, Any]
         if config.profiling_enabled:
             self._profiler.start()
         if config.runtime_metrics_enabled:
+            from ddtrace.runtime import RuntimeMetrics
+
             RuntimeMetrics.enable(tracer=self._tracer)
 
         self._agent = DDAgent(version=config.agent_version, config=config)
@@ -317,6 +437,65 @@ class DDClient:
             remoteconfig_poller.enable()
             ddtrace.config.enable_remote_configuration()
 
+    @property
+    def _logger(self):
+        # type: () -> V2LogWriter
+        # Created on first use so that clients which never log do not spin up
+        # the writer thread.
+        if self._log_writer is None:
+            # The lazy subsystems are built outside of the lock and then
+            # published, as building them can emit log records that a
+            # DDLogHandler feeds straight back into this property.
+            log_writer = V2LogWriter(
+                site=self._config.site,
+                api_key=self._config.api_key,
+                interval=0.5,
+                timeout=2.0,
+                sender=self._sender,
+            )
+            with self._lazy_lock:
+                published = self._log_writer is None
+                if published:
+                    self._log_writer = log_writer
+            if published:
+                log_writer.start()
+        return cast(V2LogWriter, self._log_writer)
+
+    @property
+    def _metrics(self):
+        # type: () -> MetricsClient
+        if self._metrics_client is None:
+            metrics_client = MetricsClient(
+                site=self._config.site,
+                api_key=self._config.api_key,
+                sender=self._sender,
+            )
+            with self._lazy_lock:
+                if self._metrics_client is None:
+                    self._metrics_client = metrics_client
+        return self._metrics_client
+
+    @property
+    def _profiler(self):
+        # type: () -> Profiler
+        if self._profiler_instance is None:
+            # Imported on first use as the profiler pulls in a large
+            # dependency tree that most clients never need.
+            from ddtrace.profiling import Profiler
+
+            profiler = Profiler(
+                # url=config.agent_url,  # this url is for backend
+                api_key=self._config.api_key,
+                service=self._config.service,
+                env=self._config.env,
+                version=self._config.version,
+                tracer=self._tracer,
+            )
+            with self._lazy_lock:
+                if self._profiler_instance is None:
+                    self._profiler_instance = profiler
+        return self._profiler_instance
+
     def trace(self, *args, **kwargs):
         # type: (...) -> ddtrace.Span
         return self._tracer.trace(*args, **kwargs)
@@ -330,77 +509,78 @@ class DDClient:
 
     def _dd_log(self, log_level, msg, tags=_sentinel):
         # TODO: timestamp
-        log = {
-            "message": msg,
-            "hostname": self._config.hostname,
-            "service": self._config.service,
-            "ddsource": "python",
-            "status": log_level,
-            "ddtags": "",
-        }
-        tags = [] if tags is _sentinel else tags
-        tags += [
-            "env:%s" % self._config.env,
-            "version:%s" % self._config.version,
-        ]
-        log["ddtags"] = ",".join(tags)
+        # _sentinel is falsy, so this also covers tags not being passed.
+        if tags:
+            ddtags = ",".join(tags) + self._ddtag_suffix
+        else:
+            ddtags = self._ddtags
         span = self._tracer.current_span()
+        log = self._log_template.copy()
+        log["message"] = msg
+        log["status"] = log_level
+        log["ddtags"] = ddtags
         if span:
             log["dd.trace_id"] = span.trace_id
             log["dd.span_id"] = span.span_id
         self._logger.enqueue(log)
 
     def _log(self, log_level, msg, tags=_sentinel, *args):
-        # type: (Literal["error", "info", "debug", "warn"], str, Optional[List[str]], ...) -> None
-        frm = inspect.stack()[2]
-        mod = inspect.getmodule(frm[0])
-        msg = "%s: %s" % (mod.__name__, msg % tuple(*args))
+        # type: (Literal["error", "info", "debug", "warn"], str, Union[_Sentinel, Sequence[str]], *Any) -> None
+        # Only the caller's module name is needed, so avoid inspect.stack()
+        # which builds FrameInfo records (and reads source) for every frame.
+        frame = sys._getframe(2)
+        mod_name = frame.f_globals.get("__name__", "?")
+        self._log_fast(mod_name, log_level, msg, tags, args)
+
+    def _log_fast(self, mod_name, log_level, msg, tags, args):
+        # type: (str, Literal["error", "info", "debug", "warn"], str, Union[_Sentinel, Optional[Sequence[str]]], Tuple[Any, ...]) -> None
+        msg = f"{mod_name}: {msg % args}"
         self._dd_log(log_level=log_level, msg=msg, tags=tags)
 
     def log(self, log_level, msg, tags=_sentinel, *args):
-        # type: (Literal["error", "info", "debug", "warn"], str, Optional[List[str]], ...) -> None
-        return self._log(log_level=log_level, msg=msg, tags=tags, *args)
+        # type: (Literal["error", "info", "debug", "warn"], str, Union[_Sentinel, Sequence[str]], *Any) -> None
+        return self._log(log_level, msg, tags, *args)
+
+    def log_from(self, module_name, log_level, msg, tags=_sentinel, *args):
+        # type: (str, Literal["error", "info", "debug", "warn"], str, Union[_Sentinel, Sequence[str]], *Any) -> None
+        # Like log() but the caller passes its module name (usually __name__)
+        # so no stack frame has to be inspected.
+        return self._log_fast(module_name, log_level, msg, tags, args)
 
     def info(self, msg, tags=_sentinel, *args):
-        return self._log("info", msg, tags=tags, *args)
+        return self._log("info", msg, tags, *args)
 
     def warning(self, msg, tags=_sentinel, *args):
-        return self._log("warn", msg, tags=tags, *args)
+        return self._log("warn", msg, tags, *args)
 
     def error(self, msg, tags=_sentinel, *args):
-        return self._log("error", msg, tags=tags, *args)
+        return self._log("error", msg, tags, *args)
 
     def count(self, metric_name=_sentinel, count=1, tags=_sentinel):
         span = self._tracer.current_span()
         if metric_name is _sentinel:
             if not span:
                 raise ValueError("No metric name possible")
-            metric_name = "%s.count" % span.name
+            metric_name = f"{span.name}.count"
 
-        tags = [] if tags is _sentinel else tags
+        tags = () if tags is _sentinel else tuple(tags)
         if span:
-            tags += [
-                "service:%s" % self._config.service,
-                "env:%s" % self._config.env,
-                "version:%s" % self._config.version,
-            ]
+            tags += self._base_metric_tags
         self._metrics.count(metric_name, count, tags=tags)
 
     def measure(self, metric_name, tags=_sentinel):
         if tags is _sentinel:
-            tags = []
+            tags = ()
         return self._metrics.measure(metric_name, tags)
 
     def gauge(self, metric_name, val, tags=_sentinel):
-        tags = [] if tags is _sentinel else tags
-        tags += [
-            "service:%s" % self._config.service,
-            "env:%s" % self._config.env,
-            "version:%s" % self._config.version,
-        ]
+        if tags is _sentinel:
+            tags = self._base_metric_tags
+        else:
+            tags = tuple(tags) + self._base_metric_tags
         span = self._tracer.current_span()
         if span:
-            metric_name = "%s.%s" % (span.name, metric_name)
+            metric_name = f"{span.name}.{metric_name}"
         self._metrics.gauge(metric_name, val, tags=tags)
 
     def profiling_start(self, *args, **kwargs):
@@ -409,21 +589,29 @@ class DDClient:
 
     def profiling_stop(self, *args, **kwargs):
         # type: (...) -> None
-        self._profiler.stop(*args, **kwargs)
+        if self._profiler_instance is not None:
+            self._profiler_instance.stop(*args, **kwargs)
 
     def _flush_traces(self):
         self._tracer.flush()
 
     def _flush_metrics(self):
-        self._metrics.flush()
+        if self._metrics_client is not None:
+            self._metrics_client.flush()
 
     def _flush_logs(self):
-        self._logger.periodic()
+        if self._log_writer is not None:
+            self._log_writer.periodic()
 
-    def flush(self):
+    def flush(self, wait=False):
+        # type: (bool) -> None
         self._flush_metrics()
         self._flush_traces()
         self._flush_logs()
+        # Logs and metrics are sent from the sender's thread. Waiting is only
+        # needed when the process is about to exit without calling shutdown().
+        if wait and not self._sender.flush(timeout=_FLUSH_TIMEOUT):
+            logger.warning("timed out waiting for logs and metrics to be sent")
 
     @property
     def log_format(self):
@@ -433,20 +621,40 @@ class DDClient:
     @property
     def LogHandler(self):
         # type: () -> Type[logging.Handler]
+        if self._log_handler_cls is not None:
+            return self._log_handler_cls
+
         _self = self
 
         class DDLogHandler(logging.Handler):
             def emit(self, record):
+                if record.levelno < self.level:
+                    return
+                # Records from this library (e.g. intake errors) would be fed
+                # back into the writer that produced them.
+                if record.name.startswith("datadog."):
+                    return
                 # TODO: error info exc_info, exc_text, funcName
-                msg = "%s: %s" % (
-                    record.__dict__["name"],
-                    record.__dict__["msg"] % record.__dict__["args"],
-                )
-                level = record.__dict__["levelname"].lower()
-                _self._dd_log(msg=msg, log_level=level)
+                try:
+                    d = record.__dict__
+                    msg = f"{d['name']}: {d['msg'] % d['args']}"
+                    level = d["levelname"].lower()
+                    _self._dd_log(msg=msg, log_level=level)
+                except Exception:
+                    self.handleError(record)
 
+        self._log_handler_cls = DDLogHandler
         return DDLogHandler
 
     def shutdown(self):
-        self.flush()
+        self._flush_metrics()
+        self._flush_traces()
+        log_writer = self._log_writer
+        if log_writer is not None and log_writer.status == ServiceStatus.RUNNING:
+            # The writer submits its remaining logs as its worker exits.
+            log_writer.stop()
+            log_writer.join(_FLUSH_TIMEOUT)
+        self._sender.stop(timeout=_FLUSH_TIMEOUT)
+        if log_writer is not None:
+            log_writer.close()
         self._agent.stop()
@@ -1,13 +1,24 @@
+import collections
+import gzip
 import json
 import logging
-import sys
 import threading
+from typing import Deque, Iterator, List, Optional, Tuple
+
+import orjson
 
 from ddtrace.internal.compat import get_connection_response, httplib
 from ddtrace.internal.periodic import PeriodicService
 
+from ._sender import HttpSender
+
 logger = logging.getLogger(__name__)
 
+_MAX_BATCH_ENTRIES = 1000
+_MAX_PAYLOAD_SIZE = 5 * 1024 * 1024
+# Level 1 gets ~90% of level 6's ratio on log payloads at ~2.5x the speed.
+_GZIP_LEVEL = 1
+
 
 class V2LogWriter(PeriodicService):
     """
@@ -20,40 +31,135 @@ class V2LogWriter(PeriodicService):
         - https://docs.datadoghq.com/api/latest/logs/#send-logs
     """
 
-    def __init__(self, site, api_key, interval, timeout):
-        # type: (str, str, float, float) -> None
+    def __init__(self, site, api_key, interval, timeout, sender, max_queue=10000):
+        # type: (str, str, float, float, HttpSender, int) -> None
         super(V2LogWriter, self).__init__(interval=interval)
-        self._lock = threading.Lock()
-        self._buffer = []
+        self._sender = sender
+        # deque.append/popleft are atomic so producers never need a lock.
+        # Logs are stored already serialized, see enqueue(). Once full the
+        # oldest logs are evicted so an unreachable intake can't exhaust
+        # memory.
+        self._buffer = collections.deque(maxlen=max_queue)  # type: Deque[bytes]
+        self.dropped = 0
+        self._reported_dropped = 0
         self._timeout = timeout  # type: float
         self._api_key = api_key
         self._site = site
         self._headers = {
             "DD-API-KEY": self._api_key,
             "Content-Type": "application/json",
+            "Content-Encoding": "gzip",
+            "Connection": "keep-alive",
         }
+        self._send_lock = threading.Lock()
+        self._conn = None  # type: Optional[httplib.HTTPSConnection]
 
     def enqueue(self, log):
         # type: (dict) -> None
-        with self._lock:
-            self._buffer.append(log)
+        # Serializing on the producer spreads the cost over the callers and
+        # leaves only a join for periodic().
+        try:
+            data = orjson.dumps(log)
+        except TypeError:
+            # orjson rejects lone surrogates (e.g. from surrogateescape
+            # decoded paths) which the stdlib escapes.
+            try:
+                data = json.dumps(log).encode()
+            except (TypeError, ValueError):
+                self.dropped += 1
+                return
+        buffer = self._buffer
+        if len(buffer) == buffer.maxlen:
+            self.dropped += 1
+        buffer.append(data)
 
     def periodic(self):
-        if not self._buffer:
+        # Reported here rather than in enqueue() as a log handler feeding
+        # this writer would otherwise re-enter it.
+        dropped = self.dropped
+        if dropped != self._reported_dropped:
+            logger.warning(
+                "dropped %d logs (%d total), the buffer was full or they could "
+                "not be serialized",
+                dropped - self._reported_dropped,
+                dropped,
+            )
+            self._reported_dropped = dropped
+
+        # Pop rather than swap the deque out: a producer could still append
+        # to a swapped out deque after it has been serialized.
+        buffer = []
+        popleft = self._buffer.popleft
+        for _ in range(len(self._buffer)):
+            try:
+                buffer.append(popleft())
+            except IndexError:
+                # Drained concurrently by a flush() on another thread.
+                break
+        if not buffer:
             return
 
-        payload = json.dumps(self._buffer)
-        self._buffer = []
-        conn = httplib.HTTPSConnection(
-            "http-intake.logs.%s" % self._site, 443, timeout=self._timeout
-        )
-        try:
-            conn.request("POST", "/api/v2/logs", payload, self._headers)
-            resp = get_connection_response(conn)
-            if resp.status >= 300:
-                print(
-                    "ddlogs error: %s %s %s" % (resp.status, resp.read(), payload),
-                    file=sys.stderr,
-                )
-        finally:
-            conn.close()
+        # Only build the payloads here; the request itself is made on the
+        # sender's thread so flush() only waits on the network if asked to.
+        for payload in self._encode(buffer):
+            self._sender.submit(self._send, gzip.compress(payload, _GZIP_LEVEL))
+
+    def on_shutdown(self):
+        # Hand whatever is left to the sender before the worker exits.
+        self.periodic()
+
+    def close(self):
+        # type: () -> None
+        with self._send_lock:
+            self._close()
+
+    def _encode(self, logs):
+        # type: (List[bytes]) -> Iterator[bytes]
+        batch = []  # type: List[bytes]
+        size = 2  # the enclosing brackets
+        for log in logs:
+            if batch and (
+                len(batch) == _MAX_BATCH_ENTRIES
+                or size + len(log) + 1 > _MAX_PAYLOAD_SIZE
+            ):
+                yield b"[" + b",".join(batch) + b"]"
+                batch = []
+                size = 2
+            batch.append(log)
+            size += len(log) + 1
+        if batch:
+            yield b"[" + b",".join(batch) + b"]"
+
+    def _post(self, body):
+        # type: (bytes) -> Tuple[int, bytes]
+        if self._conn is None:
+            self._conn = httplib.HTTPSConnection(
+                "http-intake.logs.%s" % self._site, 443, timeout=self._timeout
+            )
+        self._conn.request("POST", "/api/v2/logs", body, self._headers)
+        resp = get_connection_response(self._conn)
+        # The body must be read before the connection can be reused.
+        return resp.status, resp.read()
+
+    def _send(self, body):
+        # type: (bytes) -> None
+        with self._send_lock:
+            try:
+                try:
+                    status, resp_body = self._post(body)
+                except (httplib.BadStatusLine, ConnectionError):
+                    # The intake closed the idle keep-alive connection, retry
+                    # once on a fresh one.
+                    self._close()
+                    status, resp_body = self._post(body)
+            except Exception:
+                self._close()
+                raise
+        if status >= 300:
+            logger.error("ddlogs intake error: status=%s body=%s", status, resp_body)
+
+    def _close(self):
+        # type: () -> None
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
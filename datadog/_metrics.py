@@ -1,81 +1,103 @@
 """
 https://docs.datadoghq.com/api/latest/metrics/
 """
+
 from contextlib import contextmanager
 import logging
-import time
+import threading
+import zlib
 from typing import Callable
+from typing import Dict
 from typing import List
 from typing import Literal
 from typing import Optional
+from typing import Sequence
 from typing import Tuple
 from typing import TypedDict
 from typing import Union
 from typing_extensions import NotRequired
 
+import orjson
 import requests
 
 from ddtrace.internal.compat import time_ns
 
+from ._sender import HttpSender
 
 log = logging.getLogger(__name__)
 
+_DEFLATE_LEVEL = 1
+_NS_PER_S = 1000000000
+
 Point = Tuple[int, Union[int, float]]
-Tags = List[str]
+Tags = Sequence[str]
+# (name, interval, tags)
+_CountKey = Tuple[str, int, Tuple[str, ...]]
+_PointType = Literal["gauge", "dist"]
+# (type, name, tags)
+_PointsKey = Tuple[_PointType, str, Tuple[str, ...]]
 
 
 class V1Metric(TypedDict):
     metric: str
-    type: Literal["count", "gauge", "rate"]
+    type: Literal["count", "gauge", "rate", "dist"]
     points: List[Point]
-    tags: List[str]
+    tags: Tags
     interval: NotRequired[int]
 
 
-class MetricsClient(object):
-    def __init__(self, site, api_key):
-        self._site = site
-        self._api_key = api_key
-        self._metrics = []  # type: List[V1Metric]
+class MetricsClient:
+    __slots__ = ("_sender", "_url", "_session", "_lock", "_count_acc", "_points")
 
-    def count(self, name, count, interval=1, tags=None):
-        # type: (str, int, int, Optional[List[str]]) -> None
-        tags = tags or []
-        point = (int(time.time()), count)  # type: Point
-        metric = V1Metric(
-            metric=name,
-            type="count",
-            interval=interval,
-            points=[point],
-            tags=tags,
+    def __init__(self, site, api_key, sender):
+        # type: (str, str, HttpSender) -> None
+        self._sender = sender
+        self._url = "https://api.%s/api/v1/series" % site
+        # A session keeps the connection to the intake alive between flushes.
+        self._session = requests.Session()
+        self._session.headers.update(
+            {
+                "Content-Type": "application/json",
+                "Content-Encoding": "deflate",
+                "DD-API-KEY": api_key,
+            }
         )
-        self._metrics.append(metric)
+        self._lock = threading.Lock()
+        # Points are aggregated per series until flushed so that repeated
+        # calls for the same metric and tags produce a single series entry.
+        self._count_acc = {}  # type: Dict[_CountKey, Dict[int, Union[int, float]]]
+        self._points = {}  # type: Dict[_PointsKey, List[Point]]
+
+    def count(self, name, count, interval=1, tags=None):
+        # type: (str, int, int, Optional[Tags]) -> None
+        key = (name, interval, tuple(tags or ()))
+        ts = time_ns() // _NS_PER_S
+        with self._lock:
+            bucket = self._count_acc.get(key)
+            if bucket is None:
+                bucket = self._count_acc[key] = {}
+            bucket[ts] = bucket.get(ts, 0) + count
+
+    def _add_point(self, type_, name, point, tags):
+        # type: (_PointType, str, Point, Optional[Tags]) -> None
+        key = (type_, name, tuple(tags or ()))
+        with self._lock:
+            points = self._points.get(key)
+            if points is None:
+                self._points[key] = [point]
+            else:
+                points.append(point)
 
     def gauge(self, name, val, tags=None):
-        # type: (str, Union[int, float], Optional[List[str]]) -> None
-        tags = tags or []
-        point = (int(time.time()), val)  # type: Point
-        metric = V1Metric(
-            metric=name,
-            type="gauge",
-            points=[point],
-            tags=tags,
-        )
-        self._metrics.append(metric)
+        # type: (str, Union[int, float], Optional[Tags]) -> None
+        self._add_point("gauge", name, (time_ns() // _NS_PER_S, val), tags)
 
     @contextmanager
     def _measure(self, name, tags):
         start = time_ns()
         yield
         end = time_ns()
-        point = (int(time.time()), end - start)  # type: Point
-        metric = V1Metric(
-            metric=name,
-            type="dist",
-            points=[point],
-            tags=tags,
-        )
-        self._metrics.append(metric)
+        self._add_point("dist", name, (end // _NS_PER_S, end - start), tags)
 
     def measure(self, name, tags=None):
         # type: (str, Optional[Tags]) -> Callable
@@ -83,18 +105,37 @@ class MetricsClient(object):
 
     def flush(self):
         # type: () -> None
-        headers = {
-            "Content-Type": "text/json",
-            "DD-API-KEY": self._api_key,
-        }
-        data = {"series": self._metrics}
-        self._metrics = []
-        resp = requests.post(
-            "https://api.%s/api/v1/series" % self._site, headers=headers, json=data
+        with self._lock:
+            counts, self._count_acc = self._count_acc, {}
+            points, self._points = self._points, {}
+        series = [
+            V1Metric(
+                metric=name,
+                type="count",
+                interval=interval,
+                points=list(buckets.items()),
+                tags=tags,
+            )
+            for (name, interval, tags), buckets in counts.items()
+        ]
+        series.extend(
+            V1Metric(metric=name, type=type_, points=pts, tags=tags)
+            for (type_, name, tags), pts in points.items()
         )
+        if not series:
+            return
+        data = {"series": series}
+        # The v1 series endpoint accepts deflate (not gzip) request bodies.
+        body = zlib.compress(orjson.dumps(data), _DEFLATE_LEVEL)
+        self._sender.submit(self._send, body)
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug(
+                "flushing %d metrics: %s",
+                len(series),
+                [f"{m['type']}<{m['metric']}>" for m in series],
+            )
+
+    def _send(self, body):
+        # type: (bytes) -> None
+        resp = self._session.post(self._url, data=body)
         resp.raise_for_status()
-        log.debug(
-            "flushed %d metrics: %s",
-            len(data["series"]),
-            ["%s<%s>" % (m["type"], m["metric"]) for m in data["series"]],
-        )
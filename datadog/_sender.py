@@ -0,0 +1,126 @@
+import logging
+import queue
+import threading
+from typing import Callable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+Send = Callable[[bytes], None]
+
+
+class HttpSender:
+    """
+    Performs blocking intake requests from a single background thread so
+    that flushing only has to serialize a payload and hand it over. Callers
+    that need the payloads delivered (e.g. before exiting) can wait with
+    flush().
+
+    When more than ``maxsize`` payloads are pending the oldest is dropped.
+    Once stopped, further payloads are discarded.
+    """
+
+    __slots__ = (
+        "_queue",
+        "_lock",
+        "_thread",
+        "_stopped",
+        "_done",
+        "_submitted",
+        "_finished",
+        "dropped",
+    )
+
+    def __init__(self, maxsize=256):
+        # type: (int) -> None
+        self._queue = queue.Queue(
+            maxsize=maxsize
+        )  # type: queue.Queue[Optional[Tuple[Send, bytes]]]
+        self._lock = threading.Lock()
+        self._thread = None  # type: Optional[threading.Thread]
+        self._stopped = False
+        # Payloads are handled in submission order, so comparing these
+        # counters tells whether a given payload has been dealt with.
+        self._done = threading.Condition(threading.Lock())
+        self._submitted = 0
+        self._finished = 0
+        self.dropped = 0
+
+    def submit(self, send, payload):
+        # type: (Send, bytes) -> None
+        item = (send, payload)
+        # Held throughout so that stop() can't enqueue its sentinel while the
+        # loop below is evicting entries.
+        with self._lock:
+            if self._stopped:
+                logger.debug("sender is stopped, discarding payload")
+                return
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run,
+                    name="%s:%s" % (__name__, self.__class__.__name__),
+                )
+                self._thread.daemon = True
+                self._thread.start()
+            while True:
+                try:
+                    self._queue.put_nowait(item)
+                    self._submitted += 1
+                    return
+                except queue.Full:
+                    try:
+                        self._queue.get_nowait()
+                    except queue.Empty:
+                        continue
+                    self._finish()
+                    self.dropped += 1
+                    logger.warning(
+                        "send queue full, dropped a payload (%d total)", self.dropped
+                    )
+
+    def _run(self):
+        # type: () -> None
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            send, payload = item
+            try:
+                send(payload)
+            except Exception:
+                logger.error("failed to send payload", exc_info=True)
+            finally:
+                self._finish()
+
+    def _finish(self):
+        # type: () -> None
+        with self._done:
+            self._finished += 1
+            self._done.notify_all()
+
+    def flush(self, timeout=None):
+        # type: (Optional[float]) -> bool
+        """Wait until the payloads submitted so far have been sent.
+
+        Payloads submitted while waiting are not waited for. Returns False if
+        ``timeout`` expired first.
+        """
+        with self._lock:
+            target = self._submitted
+        with self._done:
+            return self._done.wait_for(lambda: self._finished >= target, timeout)
+
+    def stop(self, timeout=None):
+        # type: (Optional[float]) -> None
+        """Send everything already submitted, then stop the thread."""
+        with self._lock:
+            self._stopped = True
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            # The thread is stuck on a request, leave it to die with the
+            # process.
+            return
+        thread.join(timeout)
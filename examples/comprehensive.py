@@ -44,4 +44,4 @@ def do_work(quantity):
 ddclient.profiling_start()
 do_work(2)
 ddclient.profiling_stop()
-ddclient.flush()
+ddclient.flush(wait=True)
@@ -14,12 +14,12 @@ setuptools.setup(
     package_data={"datadog": ["py.typed"]},
     install_requires=[
         "ddtrace==2.6.3",
+        "orjson",
         "requests",
         "GitPython",
-        "typing; python_version<'3.5'",
         "typing_extensions",
     ],
-    python_requires=">=2.7",
+    python_requires=">=3.9",
     tests_require=[
         "mypy",
         "black",